@@ -1,108 +1,337 @@
-import whoosh
 from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, abort
 import os
 import logging
-from whoosh.fields import Schema, TEXT, ID, NUMERIC, DATETIME
+from whoosh.fields import Schema, TEXT, ID, NUMERIC, DATETIME, STORED
 from whoosh.index import create_in, open_dir
 from whoosh.qparser import QueryParser
 from whoosh import index
 from whoosh import writing
-from PyPDF2 import PdfReader
-import re
+from whoosh import highlight
+import pypdfium2 as pdfium
 from datetime import datetime
-import mimetypes
 import shutil
 import sys
+import queue
+import threading
+import time
+from cachetools import TTLCache
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', filename='app.log', filemode='w')
+# Configure logging. Append mode (O_APPEND) because spawned extraction workers re-import this module and
+# log to the same file; the log is truncated once per run in init_app instead.
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', filename='app.log', filemode='a')
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'dev_key'
-mimetypes.init()  # Initialize mimetypes for file downloads
 
 # Project paths
 BOOKS_DIR = 'books'
 INDEX_DIR = 'indexdir'
 
+_PDF_SUFFIX = '.pdf'
+
+# During index_books, PDFs longer than this are split into page ranges extracted in parallel
+PAGES_PER_WORKER = 50
+
+# index_books extracts and commits at most this many changed PDFs at a time
+INDEX_BATCH_SIZE = 50
+
+# Extraction workers are spawned as fresh interpreters: never forked from a threaded web worker (which could
+# deadlock on locks held by other threads), and with no forkserver whose pid gunicorn workers would inherit
+# from a preloaded master
+EXTRACT_CONTEXT = multiprocessing.get_context('spawn')
+
+# PDFium is not thread-safe; in-process calls from request and indexer threads take this lock
+pdfium_lock = threading.Lock()
+
+# Uploads are indexed by a background thread, up to this many per commit
+UPLOAD_BATCH_SIZE = 20
+pending_queue = queue.Queue()
+upload_indexer = None
+upload_indexer_lock = threading.Lock()
+
+# Stateless, so one fragmenter is shared by every search; HtmlFormatter tracks term classes and is built per query
+SNIPPET_FRAGMENTER = highlight.ContextFragmenter(maxchars=150, surround=40)
+
+# Home page book list, rebuilt only when the books directory changes
+_books_cache = {'dir_mtime': None, 'data': None}
+
+# Ranked results per (query, sort order, index generation) so paging through results does not re-run the search
+_search_cache = TTLCache(maxsize=256, ttl=120)
+search_cache_lock = threading.Lock()
+
+# An empty search re-indexes the library at most once per this many seconds
+SEARCH_REINDEX_COOLDOWN = 300
+_search_reindex = {'last': None}
+search_reindex_lock = threading.Lock()
+
+# Whoosh allows a single writer per index; serialize writers across threads
+index_write_lock = threading.Lock()
+# ...and wait this many seconds for the index lock held by another worker process
+WRITE_LOCK_TIMEOUT = 30
+
 # Define the current schema
 current_schema = Schema(
     title=TEXT(stored=True),
     content=TEXT(stored=True),
-    path=ID(stored=True, unique=True),
+    path=ID(stored=True, unique=True, sortable=True),
     page_count=NUMERIC(stored=True),
     category=TEXT(stored=True),
-    date_added=DATETIME(stored=True)
+    date_added=DATETIME(stored=True),
+    date_added_str=STORED,  # YYYY-MM-DD, formatted once at index time; read back only, never queried
+    mtime=NUMERIC(int, bits=64, stored=True, sortable=True)  # st_mtime_ns; path and mtime are columns so index_books can read them cheaply
 )
 
-def extract_text_from_pdf(pdf_path):
+def is_pdf(filename):
+    # The two common spellings are checked without allocating a lowered copy of the name
+    return filename.endswith(_PDF_SUFFIX) or filename.endswith('.PDF') or filename[-4:].lower() == _PDF_SUFFIX
+
+def extract_page_text(page):
+    textpage = page.get_textpage()
+    try:
+        # Normalize whitespace per page so no whole-document copy is ever regex-scanned
+        return " ".join(textpage.get_text_range().split())
+    finally:
+        textpage.close()
+        page.close()
+
+def extract_pages(pdf, start, stop):
+    pages = []
+    for i in range(start, stop):
+        page_text = extract_page_text(pdf[i])
+        if page_text:
+            pages.append(page_text)
+    return " ".join(pages)
+
+def extract_text_and_meta(pdf_path):
     try:
-        reader = PdfReader(pdf_path)
-        text = " ".join(page.extract_text() or "" for page in reader.pages)
-        text = re.sub(r'\s+', ' ', text).strip()
+        with pdfium_lock:
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                page_count = len(pdf)
+                text = extract_pages(pdf, 0, page_count)
+            finally:
+                pdf.close()
         if not text:
             logger.warning(f"No text extracted from {pdf_path}. Possibly image-based PDF.")
-        return text
+        return text, page_count
     except Exception as e:
-        logger.error(f"PyPDF2 extraction failed for {pdf_path}: {str(e)}")
-        return ""
+        logger.error(f"pypdfium2 extraction failed for {pdf_path}: {str(e)}")
+        return "", 0
 
-def create_or_open_index():
+@lru_cache(maxsize=512)
+def _details_cached(pdf_path, mtime, size):
+    # Only the first page is read; the details view shows a short excerpt, not the book
+    with pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page_count = len(pdf)
+            excerpt = extract_page_text(pdf[0])[:200] + "..." if page_count else "No excerpt available."
+        finally:
+            pdf.close()
+    return excerpt, page_count
+
+def book_details(pdf_path):
+    # Keyed on mtime and size so a replaced file is never served a stale excerpt
+    stat = os.stat(pdf_path)
+    return _details_cached(pdf_path, stat.st_mtime, stat.st_size)
+
+def _open_validated_index():
     if not os.path.exists(INDEX_DIR):
         os.mkdir(INDEX_DIR)
         logger.info(f"Created new index directory: {INDEX_DIR}")
-        return create_in(INDEX_DIR, current_schema)
+        return create_in(INDEX_DIR, current_schema), True
     
     try:
         ix = open_dir(INDEX_DIR)
         existing_schema = ix.schema
-        if not all(field in existing_schema.names() for field in current_schema.names()):
+        # Every current field must exist, and fields read as columns must have been indexed with one
+        if not all(name in existing_schema and (current_schema[name].column_type is None or existing_schema[name].column_type is not None) for name in current_schema.names()):
             logger.warning(f"Schema mismatch detected. Rebuilding index from {INDEX_DIR}")
             shutil.rmtree(INDEX_DIR, ignore_errors=True)
             os.mkdir(INDEX_DIR)
-            return create_in(INDEX_DIR, current_schema)
-        return ix
+            return create_in(INDEX_DIR, current_schema), True
+        return ix, False
     except Exception as e:
         logger.error(f"Failed to open index directory {INDEX_DIR}: {str(e)}. Rebuilding index.")
         shutil.rmtree(INDEX_DIR, ignore_errors=True)
         os.mkdir(INDEX_DIR)
-        return create_in(INDEX_DIR, current_schema)
+        return create_in(INDEX_DIR, current_schema), True
+
+def create_or_open_index():
+    # The schema is validated (and the index rebuilt if needed) once; later calls reuse the shared handle
+    if getattr(app, 'ix', None) is not None:
+        return app.ix, False
+    app.ix, was_created = _open_validated_index()
+    return app.ix, was_created
+
+def _extract_job(pdf_path, start, stop):
+    # Runs in a single-threaded worker process, so PDFium needs no lock here. stop is clamped to the
+    # page count, which is returned from the same open so the first job for a file can plan the rest.
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page_count = len(pdf)
+            return extract_pages(pdf, start, min(stop, page_count)), page_count
+        finally:
+            pdf.close()
+    except Exception as e:
+        logger.error(f"pypdfium2 extraction failed for {pdf_path} pages {start}-{stop}: {str(e)}")
+        return "", 0
+
+def extract_books(pdf_paths):
+    # One pool serves every file. Only PDFs longer than PAGES_PER_WORKER get follow-up page-range jobs,
+    # so a single big book is not serialized while short ones are opened exactly once.
+    chunks, page_counts = {}, {}
+    if pdf_paths:
+        with ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=EXTRACT_CONTEXT) as executor:
+            first_jobs = {executor.submit(_extract_job, pdf_path, 0, PAGES_PER_WORKER): pdf_path for pdf_path in pdf_paths}
+            for future in as_completed(first_jobs):
+                pdf_path = first_jobs[future]
+                text, page_count = future.result()
+                page_counts[pdf_path] = page_count
+                chunks[pdf_path] = [text] + [executor.submit(_extract_job, pdf_path, start, min(start + PAGES_PER_WORKER, page_count)) for start in range(PAGES_PER_WORKER, page_count, PAGES_PER_WORKER)]
+    extracted = {}
+    for pdf_path in pdf_paths:
+        # Follow-up futures were submitted in page order and are all done once the pool has shut down
+        texts = [chunks[pdf_path][0]] + [future.result()[0] for future in chunks[pdf_path][1:]]
+        content = " ".join(text for text in texts if text)
+        if not content:
+            logger.warning(f"No text extracted from {pdf_path}. Possibly image-based PDF.")
+        extracted[pdf_path] = (content, page_counts[pdf_path])
+    return extracted
 
 def index_books(ix):
     try:
-        with ix.writer() as writer:
-            indexed_files = set()
-            for filename in os.listdir(BOOKS_DIR):
-                if filename.lower().endswith('.pdf') and filename not in indexed_files:
-                    pdf_path = os.path.join(BOOKS_DIR, filename)
-                    if os.path.exists(pdf_path):
-                        title = os.path.splitext(filename)[0]
-                        content = extract_text_from_pdf(pdf_path)
-                        if content:
-                            writer.add_document(
-                                title=title,
-                                content=content,
-                                path=filename,
-                                page_count=len(PdfReader(pdf_path).pages),
-                                category="Uncategorized",
-                                date_added=datetime.now()
-                            )
-                            indexed_files.add(filename)
-            logger.info(f"Indexed {len(indexed_files)} books.")
+        pdf_paths, mtimes, categories = [], {}, {}
+        with ix.searcher() as searcher:
+            reader = searcher.reader()
+            # Columns avoid unpickling every stored document, content included, just to compare mtimes
+            existing = {}
+            if reader.has_column('path'):  # an index with no segments yet has no columns
+                paths, indexed_mtimes = reader.column_reader('path'), reader.column_reader('mtime')
+                existing = {paths[docnum]: indexed_mtimes[docnum] for docnum in reader.all_doc_ids()}
+            with os.scandir(BOOKS_DIR) as entries:
+                for entry in entries:
+                    if is_pdf(entry.name):
+                        mtimes[entry.name] = entry.stat().st_mtime_ns
+                        if mtimes[entry.name] != existing.get(entry.name):
+                            pdf_paths.append(entry.path)
+                            if entry.name in existing:
+                                # Keep a changed book's category; only these few stored documents are loaded
+                                categories[entry.name] = searcher.document(path=entry.name).get('category', 'Uncategorized')
+        now = datetime.now()
+        indexed_files = set()
+        for batch_start in range(0, len(pdf_paths), INDEX_BATCH_SIZE):
+            # Extract before taking the write lock, so writers in other workers only wait for the adds
+            extracted = extract_books(pdf_paths[batch_start:batch_start + INDEX_BATCH_SIZE])
+            # Single-process writer: Whoosh's MpWriter only hands work to a sub-writer per 100 buffered documents,
+            # more than one batch holds, and it forks from the calling (possibly request) thread
+            with index_write_lock, ix.writer(limitmb=512, timeout=WRITE_LOCK_TIMEOUT) as writer:
+                for pdf_path, (content, page_count) in extracted.items():
+                    if content:
+                        filename = os.path.basename(pdf_path)
+                        writer.update_document(
+                            title=os.path.splitext(filename)[0],
+                            content=content,
+                            path=filename,
+                            page_count=page_count,
+                            category=categories.get(filename, "Uncategorized"),
+                            date_added=now,
+                            date_added_str=now.strftime('%Y-%m-%d'),
+                            mtime=mtimes[filename]
+                        )
+                        indexed_files.add(filename)
+            invalidate_search_cache()
+        logger.info(f"Indexed {len(indexed_files)} books, skipped {len(mtimes) - len(pdf_paths)} unchanged.")
         return len(indexed_files)
     except Exception as e:
         logger.error(f"Indexing error: {str(e)}")
         return 0
 
+def index_pending_uploads():
+    while True:
+        batch = [pending_queue.get()]
+        while len(batch) < UPLOAD_BATCH_SIZE:
+            try:
+                batch.append(pending_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            # Extract outside the write lock so searches and deletes are not held up
+            extracted = []
+            for filename, category in batch:
+                try:
+                    mtime = os.stat(os.path.join(BOOKS_DIR, filename)).st_mtime_ns
+                except FileNotFoundError:
+                    logger.warning(f"Queued upload {filename} was removed before indexing. Skipping.")
+                    continue
+                extracted.append((filename, category, mtime) + extract_text_and_meta(os.path.join(BOOKS_DIR, filename)))
+            ix = app.ix
+            now = datetime.now()
+            with index_write_lock, ix.writer(limitmb=256, timeout=WRITE_LOCK_TIMEOUT) as writer:
+                for filename, category, mtime, content, page_count in extracted:
+                    logger.info(f"Extracted content length for {filename}: {len(content)}")
+                    if content:
+                        # path is the unique key; a concurrent re-index may already have added this file
+                        writer.update_document(
+                            title=os.path.splitext(filename)[0],
+                            content=content,
+                            path=filename,
+                            page_count=page_count,
+                            category=category,
+                            date_added=now,
+                            date_added_str=now.strftime('%Y-%m-%d'),
+                            mtime=mtime
+                        )
+                        logger.info(f"Indexed document: {filename}")
+                    else:
+                        logger.warning(f"No text extracted from {filename}. Removing upload; file may be image-based.")
+                        try:
+                            os.remove(os.path.join(BOOKS_DIR, filename))
+                        except FileNotFoundError:
+                            pass
+                        invalidate_books_cache()
+            invalidate_search_cache()
+            logger.info(f"Committed batch of {len(batch)} uploads.")
+        except Exception as e:
+            logger.error(f"Background indexing error: {str(e)}", exc_info=True)
+        finally:
+            for _ in batch:
+                pending_queue.task_done()
+
+def ensure_upload_indexer():
+    global upload_indexer
+    with upload_indexer_lock:
+        if upload_indexer is None or not upload_indexer.is_alive():
+            upload_indexer = threading.Thread(target=index_pending_uploads, name='upload-indexer', daemon=True)
+            upload_indexer.start()
+
+def list_books():
+    dir_mtime = os.stat(BOOKS_DIR).st_mtime_ns
+    if _books_cache['dir_mtime'] != dir_mtime:
+        with os.scandir(BOOKS_DIR) as entries:
+            _books_cache['data'] = [{'filename': entry.name, 'title': os.path.splitext(entry.name)[0], 'category': 'Uncategorized', 'date_added': datetime.fromtimestamp(entry.stat().st_ctime).strftime('%Y-%m-%d')} for entry in entries if is_pdf(entry.name)]
+        _books_cache['dir_mtime'] = dir_mtime
+    return _books_cache['data']
+
+def invalidate_books_cache():
+    _books_cache['dir_mtime'] = None
+
+def invalidate_search_cache():
+    with search_cache_lock:
+        _search_cache.clear()
+
 @app.route('/')
 @app.route('/home')
 def home():
     try:
         if not os.path.exists(BOOKS_DIR):
             os.makedirs(BOOKS_DIR)
-        raw_books = [f for f in os.listdir(BOOKS_DIR) if f.lower().endswith('.pdf')]
-        books = [{'filename': book, 'title': os.path.splitext(book)[0], 'category': 'Uncategorized', 'date_added': datetime.fromtimestamp(os.path.getctime(os.path.join(BOOKS_DIR, book))).strftime('%Y-%m-%d')} for book in raw_books]
+        books = list_books()
         return render_template('index.html', books=books, page=1, per_page=10)
     except Exception as e:
         logger.error(f"Home route error: {str(e)}")
@@ -125,7 +354,7 @@ def upload():
         file = request.files['file']
         logger.info(f"Received file: {file.filename}")
         category = request.form.get('category', 'Uncategorized')
-        if file.filename == '' or not file.filename.lower().endswith('.pdf'):
+        if file.filename == '' or not is_pdf(file.filename):
             logger.warning(f"Invalid file: {file.filename}")
             flash('Please select a valid PDF file.', 'danger')
             return redirect(url_for('upload_page'))
@@ -143,26 +372,11 @@ def upload():
         
         file.save(filepath)
         logger.info(f"File saved successfully: {filepath}")
-        ix = create_or_open_index()
-        with ix.writer() as writer:
-            title = os.path.splitext(file.filename)[0]
-            content = extract_text_from_pdf(filepath)
-            logger.info(f"Extracted content length: {len(content) if content else 0}")
-            if content:
-                writer.add_document(
-                    title=title,
-                    content=content,
-                    path=file.filename,
-                    page_count=len(PdfReader(filepath).pages),
-                    category=category,
-                    date_added=datetime.now()
-                )
-                logger.info(f"Indexed document: {file.filename}")
-                flash(f'Uploaded and indexed: {file.filename} (Category: {category})', 'success')
-            else:
-                logger.warning(f"No text extracted from {file.filename}")
-                flash(f'Failed to extract text from {file.filename}. File may be image-based.', 'danger')
-                os.remove(filepath)
+        invalidate_books_cache()
+        ensure_upload_indexer()
+        pending_queue.put((file.filename, category))
+        logger.info(f"Queued for indexing: {file.filename}")
+        flash(f'Uploaded: {file.filename} (Category: {category}). Indexing in background; PDFs with no extractable text (e.g. scanned images) will be discarded.', 'success')
         return redirect(url_for('upload_page'))
     except PermissionError as e:
         logger.error(f"Permission denied while uploading: {str(e)}")
@@ -173,6 +387,49 @@ def upload():
         flash(f'Error uploading file: {e}', 'danger')
         return redirect(url_for('upload_page'))
 
+def add_snippets(ix, query_str, results):
+    pending = [result for result in results if result['snippet'] is None]
+    if not pending:
+        return
+    field = ix.schema['content']
+    formatter = highlight.HtmlFormatter()
+    with ix.searcher() as searcher:
+        query = QueryParser("content", ix.schema).parse(query_str)
+        words = frozenset(field.from_bytes(text) for _, text in query.existing_terms(searcher.reader(), fieldname="content", expand=True))
+        for result in pending:
+            stored = searcher.document(path=result['path']) or {}
+            snippet = highlight.highlight(stored.get('content', ''), words, field.analyzer, SNIPPET_FRAGMENTER, formatter, top=1)
+            result['snippet'] = snippet or 'No snippet available.'
+
+def rank_results(results, sort_by):
+    # Snippets are filled in after pagination, only for the hits actually rendered
+    search_results = []
+    for result in results:
+        search_results.append({
+            'title': result['title'],
+            'path': result['path'],
+            'score': result.score,
+            'snippet': None,
+            'category': result.get('category', 'Uncategorized'),
+            'date_added': result.get('date_added_str', '')
+        })
+    
+    if sort_by == 'title':
+        search_results.sort(key=lambda x: x['title'])
+    elif sort_by == 'date':
+        # ISO dates sort correctly as strings
+        search_results.sort(key=lambda x: x['date_added'], reverse=True)
+    return search_results
+
+def claim_search_reindex():
+    with search_reindex_lock:
+        now = time.monotonic()
+        last = _search_reindex['last']
+        if last is not None and now - last < SEARCH_REINDEX_COOLDOWN:
+            return False
+        _search_reindex['last'] = now
+        return True
+
 @app.route('/search')
 def search_page():
     return render_template('search.html')
@@ -186,40 +443,39 @@ def search():
             flash('Please enter a search term.', 'warning')
             return redirect(url_for('search_page'))
         
-        ix = create_or_open_index()
-        with ix.searcher() as searcher:
+        # The index generation keeps results committed by other worker processes from being served stale
+        cache_key = (query_str, sort_by, app.ix.latest_generation())
+        with search_cache_lock:
+            search_results = _search_cache.get(cache_key)
+        if search_results is None:
+            ix = app.ix
             query = QueryParser("content", ix.schema).parse(query_str)
-            results = searcher.search(query, limit=100)
-            
-            if len(results) == 0:
-                logger.warning(f"No results for query '{query_str}'. Triggering re-index.")
-                flash('No results found. Re-indexing library...', 'info')
-                index_books(ix)
-                results = searcher.search(query, limit=100)
-            
-            search_results = []
-            for result in results:
-                snippet = result.highlights("content", top=1)
-                search_results.append({
-                    'title': result['title'],
-                    'path': result['path'],
-                    'score': result.score,
-                    'snippet': snippet or 'No snippet available.',
-                    'category': result.get('category', 'Uncategorized'),
-                    'date_added': result.get('date_added', datetime.now()).strftime('%Y-%m-%d')
-                })
+            with ix.searcher() as searcher:
+                search_results = rank_results(searcher.search(query, limit=100), sort_by)
             
-            if sort_by == 'title':
-                search_results.sort(key=lambda x: x['title'])
-            elif sort_by == 'date':
-                search_results.sort(key=lambda x: datetime.strptime(x['date_added'], '%Y-%m-%d'), reverse=True)
+            if not search_results:
+                if claim_search_reindex():
+                    logger.warning(f"No results for query '{query_str}'. Triggering re-index.")
+                    flash('No results found. Re-indexing library...', 'info')
+                    index_books(ix)
+                    # A searcher only sees the index as it was when opened, so retry on a fresh one
+                    with ix.searcher() as searcher:
+                        search_results = rank_results(searcher.search(query, limit=100), sort_by)
+                else:
+                    logger.info(f"No results for query '{query_str}'. Re-index skipped during cooldown.")
             
-            per_page = 5
-            page = int(request.form.get('page', 1))
-            start = (page - 1) * per_page
-            end = start + per_page
-            paginated_results = search_results[start:end]
-            total_pages = (len(search_results) + per_page - 1) // per_page
+            # Empty results are not cached so a later re-index is picked up immediately
+            if search_results:
+                with search_cache_lock:
+                    _search_cache[cache_key] = search_results
+        
+        per_page = 5
+        page = int(request.form.get('page', 1))
+        start = (page - 1) * per_page
+        end = start + per_page
+        paginated_results = search_results[start:end]
+        total_pages = (len(search_results) + per_page - 1) // per_page
+        add_snippets(app.ix, query_str, paginated_results)
 
         return render_template('search.html', results=paginated_results, query=query_str, page=page, total_pages=total_pages, sort_by=sort_by)
     except Exception as e:
@@ -232,12 +488,17 @@ def delete(filename):
     try:
         filepath = os.path.join(BOOKS_DIR, filename)
         if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Successfully deleted file: {filepath}")
-            ix = create_or_open_index()
-            with ix.writer() as writer:
+            ix = app.ix
+            # Remove the file only once the index entry is queued for deletion; if either step fails the writer
+            # is cancelled and the file and index stay consistent
+            with index_write_lock, ix.writer(timeout=WRITE_LOCK_TIMEOUT) as writer:
                 writer.delete_by_term('path', filename)
-                flash(f'Deleted: {filename} and updated index.', 'success')
+                os.remove(filepath)
+            logger.info(f"Successfully deleted file: {filepath}")
+            flash(f'Deleted: {filename} and updated index.', 'success')
+            _details_cached.cache_clear()
+            invalidate_books_cache()
+            invalidate_search_cache()
         else:
             flash(f'File not found: {filename}', 'danger')
         return redirect(url_for('home'))
@@ -255,9 +516,7 @@ def details(filename):
     try:
         filepath = os.path.join(BOOKS_DIR, filename)
         if os.path.exists(filepath):
-            reader = PdfReader(filepath)
-            page_count = len(reader.pages)
-            excerpt = reader.pages[0].extract_text()[:200] + "..." if reader.pages else "No excerpt available."
+            excerpt, page_count = book_details(filepath)
             return render_template('details.html', filename=filename, title=os.path.splitext(filename)[0], page_count=page_count, excerpt=excerpt)
         abort(404)
     except Exception as e:
@@ -280,7 +539,7 @@ def download(filename):
 @app.route('/index_books')
 def index_books_route():
     try:
-        ix = create_or_open_index()
+        ix = app.ix
         num_indexed = index_books(ix)
         flash(f'Re-indexed {num_indexed} books successfully!', 'info')
     except Exception as e:
@@ -295,44 +554,55 @@ def serve_pdf(filename):
     except FileNotFoundError:
         abort(404)
 
+def init_app():
+    # Start each run with a fresh log; every handler appends, so writes continue from the new end
+    os.truncate('app.log', 0)
+    logger.info("Starting application...")
+    logger.info(f"Python version: {sys.version}")
+    logger.info(f"Current directory: {os.getcwd()}")
+    logger.info(f"Checking directories: books={os.path.exists(BOOKS_DIR)}, indexdir={os.path.exists(INDEX_DIR)}")
+    
+    # Verify template directory and files
+    template_dir = os.path.join(os.getcwd(), 'templates')
+    if not os.path.exists(template_dir):
+        logger.error(f"Template directory not found at {template_dir}")
+        raise FileNotFoundError(f"Template directory 'templates' not found. Create it and add index.html, upload.html, search.html, details.html.")
+    required_templates = ['index.html', 'upload.html', 'search.html', 'details.html']
+    for template in required_templates:
+        if not os.path.exists(os.path.join(template_dir, template)):
+            logger.error(f"Template {template} not found in {template_dir}")
+            raise FileNotFoundError(f"Template {template} missing. Ensure all templates are in 'templates/'.")
+
+    # Verify static directory
+    static_dir = os.path.join(os.getcwd(), 'static')
+    if not os.path.exists(static_dir) or not os.path.exists(os.path.join(static_dir, 'style.css')):
+        logger.error(f"Static directory or style.css not found at {static_dir}")
+        raise FileNotFoundError(f"Static directory 'static' or style.css missing. Create it and add style.css.")
+
+    # Additional environment checks
+    if sys.version_info < (3, 8):
+        logger.error(f"Python version {sys.version} is too old. Requires 3.8+.")
+        raise RuntimeError("Python 3.8 or higher required.")
+
+    # Opened once and shared by every request; searchers and writers are derived per use
+    ix, was_created = create_or_open_index()
+    if was_created:
+        logger.info("No existing index found. Initializing indexing...")
+    else:
+        logger.info("Existing index found. Indexing new or changed books...")
+    # Always run: unchanged books are skipped by mtime, and uploads still queued in memory when a
+    # previous process stopped are on disk but not yet indexed
+    index_books(ix)
+    # Open a searcher once so the first search does not pay for reading the TOC and segment files
+    with ix.searcher():
+        pass
+
 if __name__ == '__main__':
+    # Local runs only; in production serve wsgi:app with gunicorn (see gunicorn.conf.py)
     try:
-        logger.info("Starting application...")
-        logger.info(f"Python version: {sys.version}")
-        logger.info(f"Current directory: {os.getcwd()}")
-        logger.info(f"Checking directories: books={os.path.exists(BOOKS_DIR)}, indexdir={os.path.exists(INDEX_DIR)}")
-        
-        # Verify template directory and files
-        template_dir = os.path.join(os.getcwd(), 'templates')
-        if not os.path.exists(template_dir):
-            logger.error(f"Template directory not found at {template_dir}")
-            raise FileNotFoundError(f"Template directory 'templates' not found. Create it and add index.html, upload.html, search.html, details.html.")
-        required_templates = ['index.html', 'upload.html', 'search.html', 'details.html']
-        for template in required_templates:
-            if not os.path.exists(os.path.join(template_dir, template)):
-                logger.error(f"Template {template} not found in {template_dir}")
-                raise FileNotFoundError(f"Template {template} missing. Ensure all templates are in 'templates/'.")
-
-        # Verify static directory
-        static_dir = os.path.join(os.getcwd(), 'static')
-        if not os.path.exists(static_dir) or not os.path.exists(os.path.join(static_dir, 'style.css')):
-            logger.error(f"Static directory or style.css not found at {static_dir}")
-            raise FileNotFoundError(f"Static directory 'static' or style.css missing. Create it and add style.css.")
-
-        # Additional environment checks
-        if sys.version_info < (3, 8):
-            logger.error(f"Python version {sys.version} is too old. Requires 3.8+.")
-            raise RuntimeError("Python 3.8 or higher required.")
-
-        ix = create_or_open_index()
-        if not whoosh.index.exists_in(INDEX_DIR):
-            logger.info("No existing index found. Initializing indexing...")
-            index_books(ix)
-        else:
-            logger.info("Existing index found. Ready to serve.")
-        
+        init_app()
         logger.info("Attempting to start Flask server...")
-        app.run(debug=True, port=5001, host='0.0.0.0')  # Allow access from any interface
+        app.run(port=5001, host='0.0.0.0', threaded=True)  # Allow access from any interface
     except Exception as e:
         logger.error(f"Application startup error: {str(e)}", exc_info=True)
         print(f"Startup failed: {e}")
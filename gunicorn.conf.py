@@ -0,0 +1,11 @@
+import multiprocessing
+
+# Run with: gunicorn wsgi:app
+bind = '0.0.0.0:5001'
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 4
+# Import wsgi (and build the index) once in the master instead of racing in every worker
+preload_app = True
+# Bulk re-indexing of large libraries can outlast the default 30s
+timeout = 300
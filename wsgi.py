@@ -0,0 +1,4 @@
+from app import app, init_app
+
+# Startup checks and index setup run once at import; with preload_app they run in the gunicorn master before workers fork
+init_app()